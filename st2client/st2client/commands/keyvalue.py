@@ -283,7 +283,7 @@ class KeyValuePairLoadCommand(resource.ResourceCommand):
             raise ValueError('"%s" is not a file' % (file_path))
 
         with open(file_path, 'r') as f:
-            kvps = json.loads(f.read())
+            kvps = json.load(f)
 
         instances = []
         for item in kvps:
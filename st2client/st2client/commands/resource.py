@@ -16,31 +16,49 @@
 import os
 import abc
 import six
-import json
 import logging
+import operator
 import httplib
 from functools import wraps
 import traceback
 
-import yaml
-
 from st2client import commands
 from st2client.exceptions.operations import OperationFailureException
 from st2client.formatters import table
 
 ALLOWED_EXTS = ['.json', '.yaml', '.yml']
-PARSER_FUNCS = {'.json': json.load, '.yml': yaml.safe_load, '.yaml': yaml.safe_load}
 LOG = logging.getLogger(__name__)
 
+# Process-local cache of resources resolved by name or id so callers which
+# resolve the same resource repeatedly (e.g. scripted update loops) don't pay
+# the name lookup + id fallback round trips each time. Invalidated by the
+# create / update / delete commands.
+_RESOURCE_CACHE = {}
+_RESOURCE_CACHE_MAX_SIZE = 256
+
+# Memoized argparse metavar and help strings - see
+# ResourceCommand._get_metavar_for_argument / _get_help_for_argument
+_ARGUMENT_METAVARS = {}
+_ARGUMENT_HELP_STRINGS = {}
+
+
+def _invalidate_resource_cache():
+    _RESOURCE_CACHE.clear()
+
 
 def add_auth_token_to_kwargs_from_cli(func):
     @wraps(func)
     def decorate(*args, **kwargs):
-        ns = args[1]
-        if getattr(ns, 'token', None):
-            kwargs['token'] = ns.token
-        if getattr(ns, 'api_key', None):
-            kwargs['api_key'] = ns.api_key
+        # Namespace attributes live in the instance dict so dict.get skips
+        # the full getattr machinery. This decorator wraps every command
+        # run method.
+        ns_vars = args[1].__dict__
+        token = ns_vars.get('token')
+        if token:
+            kwargs['token'] = token
+        api_key = ns_vars.get('api_key')
+        if api_key:
+            kwargs['api_key'] = api_key
         return func(*args, **kwargs)
     return decorate
 
@@ -69,8 +87,10 @@ class ResourceBranch(commands.Branch):
             help=('List of commands for managing %s.' %
                   self.resource.get_plural_display_name().lower()))
 
-        # Resolves if commands need to be overridden.
-        commands = commands or {}
+        # Resolves if commands need to be overridden. Work on a copy so the
+        # defaults inserted below never leak into a caller-supplied dict
+        # which may be shared between branches.
+        commands = dict(commands) if commands else {}
         cmd_map = {
             "list": ResourceListCommand,
             "get": ResourceGetCommand,
@@ -111,6 +131,13 @@ class ResourceCommand(commands.Command):
 
         self.resource = resource
 
+        # C-level accessor for the primary key attribute on parsed args -
+        # avoids a reflective getattr call on every command execution
+        if self.pk_argument_name:
+            self._get_pk = operator.attrgetter(self.pk_argument_name)
+        else:
+            self._get_pk = None
+
         if has_token_opt:
             self.parser.add_argument('-t', '--token', dest='token',
                                      help='Access token for user authentication. '
@@ -188,6 +215,16 @@ class ResourceCommand(commands.Command):
         return instance
 
     def get_resource_by_name_or_id(self, name_or_id, **kwargs):
+        try:
+            cache_key = (self.resource.__name__, name_or_id,
+                         frozenset(six.iteritems(kwargs)))
+        except TypeError:
+            # Unhashable kwarg value - skip the cache
+            cache_key = None
+
+        if cache_key is not None and cache_key in _RESOURCE_CACHE:
+            return _RESOURCE_CACHE[cache_key]
+
         instance = self.get_resource_by_name(name=name_or_id, **kwargs)
         if not instance:
             instance = self.get_resource_by_pk(pk=name_or_id, **kwargs)
@@ -196,6 +233,12 @@ class ResourceCommand(commands.Command):
             message = ('Resource with id or name "%s" doesn\'t exist.' %
                        (name_or_id))
             raise ResourceNotFoundError(message)
+
+        if cache_key is not None:
+            if len(_RESOURCE_CACHE) >= _RESOURCE_CACHE_MAX_SIZE:
+                _RESOURCE_CACHE.clear()
+            _RESOURCE_CACHE[cache_key] = instance
+
         return instance
 
     def get_resource_by_ref_or_id(self, ref_or_id, **kwargs):
@@ -207,6 +250,13 @@ class ResourceCommand(commands.Command):
             raise ResourceNotFoundError(message)
         return instance
 
+    def _load_instance_from_file(self, file_path):
+        """
+        Load a meta file and deserialize it into a resource instance.
+        """
+        data = load_meta_file(file_path)
+        return self.resource.deserialize(data)
+
     @abc.abstractmethod
     def run(self, args, **kwargs):
         raise NotImplementedError
@@ -216,11 +266,27 @@ class ResourceCommand(commands.Command):
         raise NotImplementedError
 
     def _get_metavar_for_argument(self, argument):
-        return argument.replace('_', '-')
+        # The computed strings only depend on the argument (and resource)
+        # and the same values are recomputed for every get / update / delete
+        # command of every resource type registered at CLI startup, so they
+        # are memoized at module level.
+        metavar = _ARGUMENT_METAVARS.get(argument)
+
+        if metavar is None:
+            metavar = argument.replace('_', '-')
+            _ARGUMENT_METAVARS[argument] = metavar
+
+        return metavar
 
     def _get_help_for_argument(self, resource, argument):
-        argument_display_name = argument.title()
         resource_display_name = resource.get_display_name().lower()
+        cache_key = (resource_display_name, argument)
+        result = _ARGUMENT_HELP_STRINGS.get(cache_key)
+
+        if result is not None:
+            return result
+
+        argument_display_name = argument.title()
 
         if 'ref' in argument:
             result = ('Reference or ID of the %s.' % (resource_display_name))
@@ -229,6 +295,7 @@ class ResourceCommand(commands.Command):
         else:
             result = ('%s of the %s.' % (argument_display_name, resource_display_name))
 
+        _ARGUMENT_HELP_STRINGS[cache_key] = result
         return result
 
 
@@ -316,7 +383,7 @@ class ResourceGetCommand(ResourceCommand):
 
     @add_auth_token_to_kwargs_from_cli
     def run(self, args, **kwargs):
-        resource_id = getattr(args, self.pk_argument_name, None)
+        resource_id = self._get_pk(args)
         return self.get_resource_by_id(resource_id, **kwargs)
 
     def run_and_print(self, args, **kwargs):
@@ -326,7 +393,7 @@ class ResourceGetCommand(ResourceCommand):
                               attributes=args.attr, json=args.json, yaml=args.yaml,
                               attribute_display_order=self.attribute_display_order)
         except ResourceNotFoundError:
-            resource_id = getattr(args, self.pk_argument_name, None)
+            resource_id = self._get_pk(args)
             self.print_not_found(resource_id)
             raise OperationFailureException('Resource %s not found.' % resource_id)
 
@@ -360,9 +427,10 @@ class ResourceCreateCommand(ResourceCommand):
 
     @add_auth_token_to_kwargs_from_cli
     def run(self, args, **kwargs):
-        data = load_meta_file(args.file)
-        instance = self.resource.deserialize(data)
-        return self.manager.create(instance, **kwargs)
+        instance = self._load_instance_from_file(args.file)
+        result = self.manager.create(instance, **kwargs)
+        _invalidate_resource_cache()
+        return result
 
     def run_and_print(self, args, **kwargs):
         try:
@@ -399,10 +467,9 @@ class ResourceUpdateCommand(ResourceCommand):
 
     @add_auth_token_to_kwargs_from_cli
     def run(self, args, **kwargs):
-        resource_id = getattr(args, self.pk_argument_name, None)
+        resource_id = self._get_pk(args)
         instance = self.get_resource(resource_id, **kwargs)
-        data = load_meta_file(args.file)
-        modified_instance = self.resource.deserialize(data)
+        modified_instance = self._load_instance_from_file(args.file)
 
         if not getattr(modified_instance, 'id', None):
             modified_instance.id = instance.id
@@ -412,7 +479,9 @@ class ResourceUpdateCommand(ResourceCommand):
                                 'does not match the ID provided in the '
                                 'command line arguments.' %
                                 self.resource.get_display_name().lower())
-        return self.manager.update(modified_instance, **kwargs)
+        result = self.manager.update(modified_instance, **kwargs)
+        _invalidate_resource_cache()
+        return result
 
     def run_and_print(self, args, **kwargs):
         instance = self.run(args, **kwargs)
@@ -447,7 +516,7 @@ class ResourceEnableCommand(ResourceCommand):
 
     @add_auth_token_to_kwargs_from_cli
     def run(self, args, **kwargs):
-        resource_id = getattr(args, self.pk_argument_name, None)
+        resource_id = self._get_pk(args)
         instance = self.get_resource(resource_id, **kwargs)
 
         data = instance.serialize()
@@ -458,7 +527,9 @@ class ResourceEnableCommand(ResourceCommand):
         data['enabled'] = True
         modified_instance = self.resource.deserialize(data)
 
-        return self.manager.update(modified_instance, **kwargs)
+        result = self.manager.update(modified_instance, **kwargs)
+        _invalidate_resource_cache()
+        return result
 
     def run_and_print(self, args, **kwargs):
         instance = self.run(args, **kwargs)
@@ -489,7 +560,7 @@ class ResourceDisableCommand(ResourceCommand):
 
     @add_auth_token_to_kwargs_from_cli
     def run(self, args, **kwargs):
-        resource_id = getattr(args, self.pk_argument_name, None)
+        resource_id = self._get_pk(args)
         instance = self.get_resource(resource_id, **kwargs)
 
         data = instance.serialize()
@@ -500,7 +571,9 @@ class ResourceDisableCommand(ResourceCommand):
         data['enabled'] = False
         modified_instance = self.resource.deserialize(data)
 
-        return self.manager.update(modified_instance, **kwargs)
+        result = self.manager.update(modified_instance, **kwargs)
+        _invalidate_resource_cache()
+        return result
 
     def run_and_print(self, args, **kwargs):
         instance = self.run(args, **kwargs)
@@ -531,12 +604,13 @@ class ResourceDeleteCommand(ResourceCommand):
 
     @add_auth_token_to_kwargs_from_cli
     def run(self, args, **kwargs):
-        resource_id = getattr(args, self.pk_argument_name, None)
+        resource_id = self._get_pk(args)
         instance = self.get_resource(resource_id, **kwargs)
         self.manager.delete(instance, **kwargs)
+        _invalidate_resource_cache()
 
     def run_and_print(self, args, **kwargs):
-        resource_id = getattr(args, self.pk_argument_name, None)
+        resource_id = self._get_pk(args)
 
         try:
             self.run(args, **kwargs)
@@ -563,5 +637,13 @@ def load_meta_file(file_path):
         raise Exception('Unsupported meta type %s, file %s. Allowed: %s' %
                         (file_ext, file_path, ALLOWED_EXTS))
 
+    # Late import to avoid paying the json / yaml import cost on every CLI
+    # invocation - the parsers are only needed when a meta file is read
+    import json
+    import yaml
+
+    parser_funcs = {'.json': json.load, '.yml': yaml.safe_load,
+                    '.yaml': yaml.safe_load}
+
     with open(file_path, 'r') as f:
-        return PARSER_FUNCS[file_ext](f)
+        return parser_funcs[file_ext](f)
@@ -90,11 +90,20 @@ class Resource(object):
 
     @classmethod
     def get_alias(cls):
-        return cls._alias if cls._alias else cls.__name__
+        # Note: The values are static so they are memoized per-class. The CLI
+        # calls those methods many times for each registered resource type
+        # during startup.
+        if '_cached_alias' not in cls.__dict__:
+            cls._cached_alias = cls._alias if cls._alias else cls.__name__
+        return cls._cached_alias
 
     @classmethod
     def get_display_name(cls):
-        return cls._display_name if cls._display_name else cls.__name__
+        if '_cached_display_name' not in cls.__dict__:
+            cls._cached_display_name = (cls._display_name
+                                        if cls._display_name
+                                        else cls.__name__)
+        return cls._cached_display_name
 
     @classmethod
     def get_plural_name(cls):
@@ -105,9 +114,11 @@ class Resource(object):
 
     @classmethod
     def get_plural_display_name(cls):
-        return (cls._plural_display_name
-                if cls._plural_display_name
-                else cls._plural)
+        if '_cached_plural_display_name' not in cls.__dict__:
+            cls._cached_plural_display_name = (cls._plural_display_name
+                                               if cls._plural_display_name
+                                               else cls._plural)
+        return cls._cached_plural_display_name
 
     @classmethod
     def get_url_path_name(cls):
@@ -13,66 +13,128 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import copy
-import six
+import re
+
+# unicode on Python 2, str on Python 3 - avoids a six indirection in the
+# per-key hot path below
+_TEXT_TYPE = type(u'')
 
 # http://docs.mongodb.org/manual/faq/developers/#faq-dollar-sign-escaping
-UNESCAPED = ['.', '$']
-ESCAPED = [u'\uFF0E', u'\uFF04']
+# Note: The character sequences are immutable tuples - they are module level
+# constants and should never be mutated at runtime
+UNESCAPED = ('.', '$')
+ESCAPED = (u'\uFF0E', u'\uFF04')
 ESCAPE_TRANSLATION = dict(zip(UNESCAPED, ESCAPED))
 UNESCAPE_TRANSLATION = dict(zip(ESCAPED, UNESCAPED))
 
 # Note: Because of old rule escaping code, two different characters can be translated back to dot
-RULE_CRITERIA_UNESCAPED = ['.']
-RULE_CRITERIA_ESCAPED = [u'\u2024']
+RULE_CRITERIA_UNESCAPED = ('.',)
+RULE_CRITERIA_ESCAPED = (u'\u2024',)
 RULE_CRITERIA_ESCAPE_TRANSLATION = dict(zip(RULE_CRITERIA_UNESCAPED,
                                             RULE_CRITERIA_ESCAPED))
 RULE_CRITERIA_UNESCAPE_TRANSLATION = dict(zip(RULE_CRITERIA_ESCAPED,
                                               RULE_CRITERIA_UNESCAPED))
 
+# Precomputed ordinal -> replacement tables so keys which do need translating
+# are rewritten with a single C-level translate() call instead of one
+# str.replace() pass per rule
+ESCAPE_TRANSLATION_TABLE = dict((ord(k), _TEXT_TYPE(v)) for k, v in
+                                ESCAPE_TRANSLATION.items())
+
+# Unescaping needs to handle both the current and the legacy rule criteria
+# escape characters. The two rule sets are disjoint so they are fused into a
+# single table and a document is unescaped in one pass instead of two.
+COMBINED_UNESCAPE_TRANSLATION = dict(UNESCAPE_TRANSLATION)
+COMBINED_UNESCAPE_TRANSLATION.update(RULE_CRITERIA_UNESCAPE_TRANSLATION)
+COMBINED_UNESCAPE_TRANSLATION_TABLE = dict(
+    (ord(k), _TEXT_TYPE(v)) for k, v in COMBINED_UNESCAPE_TRANSLATION.items())
+
+
+def _compile_search_pattern(translation):
+    return re.compile(u'[%s]' % (re.escape(u''.join(translation))))
+
+
+# Precompiled character class patterns so detecting whether a key needs
+# translating at all is a single C-level scan instead of one substring
+# check per translation rule
+ESCAPE_SEARCH_PATTERN = _compile_search_pattern(ESCAPE_TRANSLATION)
+COMBINED_UNESCAPE_SEARCH_PATTERN = _compile_search_pattern(
+    COMBINED_UNESCAPE_TRANSLATION)
+
+
+def _translate_key(key, translation, table, search):
+    if search(key) is None:
+        # Fast path - the key doesn't contain any of the translated characters
+        # (the common case) so no new string needs to be built at all
+        return key
+
+    if isinstance(key, _TEXT_TYPE):
+        return key.translate(table)
+
+    # Python 2 byte string - translate() tables don't apply, fall back to
+    # per-rule replace (result is coerced to unicode, same as before)
+    for t_k, t_v in translation.items():
+        key = key.replace(t_k, t_v)
+    return key
+
+
+def _translate_dict(field, translation, table, search):
+    # Note: The translated copy is built directly while walking the document
+    # instead of deepcopy-ing it first and rewriting keys in place, so each
+    # document is visited exactly once. The dict class is preserved for types
+    # which support empty construction (e.g. bson SON) since mongo documents
+    # can arrive as SON instances, but wrappers such as mongoengine's BaseDict
+    # require the parent document in their constructor so those fall back to
+    # a plain dict.
+    cls = field.__class__
+
+    if cls is dict:
+        result = {}
+    else:
+        try:
+            result = cls()
+        except TypeError:
+            result = {}
+
+    for key, value in field.items():
+        if isinstance(value, dict):
+            value = _translate_dict(value, translation, table, search)
+        elif isinstance(value, list):
+            value = _translate_list(value, translation, table, search)
 
-def _prep_work_items(d):
-    return [(k, v, d) for k, v in six.iteritems(d)]
+        result[_translate_key(key, translation, table, search)] = value
 
+    return result
 
-def _translate_chars(field, translation):
-    # Only translate the fields of a dict
-    if not isinstance(field, dict):
-        return field
 
-    work_items = _prep_work_items(field)
+def _translate_list(items, translation, table, search):
+    result = []
 
-    while len(work_items) > 0:
-        work_item = work_items.pop(0)
-        oldkey = work_item[0]
-        value = work_item[1]
-        work_field = work_item[2]
-        newkey = oldkey
+    for item in items:
+        if isinstance(item, dict):
+            item = _translate_dict(item, translation, table, search)
+        elif isinstance(item, list):
+            item = _translate_list(item, translation, table, search)
 
-        for t_k, t_v in six.iteritems(translation):
-            newkey = newkey.replace(t_k, t_v)
+        result.append(item)
 
-        if newkey != oldkey:
-            work_field[newkey] = value
-            del work_field[oldkey]
+    return result
 
-        if isinstance(value, dict):
-            work_items.extend(_prep_work_items(value))
-        elif isinstance(value, list):
-            for item in value:
-                if isinstance(item, dict):
-                    work_items.extend(_prep_work_items(item))
 
-    return field
+def _translate_chars(field, translation, table, search):
+    # Only translate the fields of a dict
+    if not isinstance(field, dict):
+        return field
+
+    return _translate_dict(field, translation, table, search)
 
 
 def escape_chars(field):
-    value = copy.deepcopy(field)
-    return _translate_chars(value, ESCAPE_TRANSLATION)
+    return _translate_chars(field, ESCAPE_TRANSLATION, ESCAPE_TRANSLATION_TABLE,
+                            ESCAPE_SEARCH_PATTERN.search)
 
 
 def unescape_chars(field):
-    value = copy.deepcopy(field)
-    translated = _translate_chars(value, UNESCAPE_TRANSLATION)
-    translated = _translate_chars(value, RULE_CRITERIA_UNESCAPE_TRANSLATION)
-    return translated
+    return _translate_chars(field, COMBINED_UNESCAPE_TRANSLATION,
+                            COMBINED_UNESCAPE_TRANSLATION_TABLE,
+                            COMBINED_UNESCAPE_SEARCH_PATTERN.search)
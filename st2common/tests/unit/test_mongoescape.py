@@ -89,3 +89,39 @@ class TestMongoEscape(unittest.TestCase):
 
         unescaped = mongoescape.unescape_chars(escaped)
         self.assertDictEqual(field, unescaped)
+
+    def test_dict_subclass_with_required_constructor_arguments(self):
+        # Simulates mongoengine's BaseDict wrapper whose constructor requires
+        # the parent document - the translated copy should silently fall back
+        # to a plain dict instead of blowing up on instantiation
+        class WrappedDict(dict):
+            def __init__(self, dict_items, instance, name):
+                self._instance = instance
+                self._name = name
+                super(WrappedDict, self).__init__(dict_items)
+
+        field = WrappedDict({'k1.k2': 'v1', 'k3': {'k4$': 'v2'}}, None, 'data')
+
+        escaped = mongoescape.escape_chars(field)
+        self.assertEqual(escaped, {u'k1\uff0ek2': 'v1',
+                                   'k3': {u'k4\uff04': 'v2'}})
+
+        unescaped = mongoescape.unescape_chars(escaped)
+        self.assertEqual(unescaped, {'k1.k2': 'v1', 'k3': {'k4$': 'v2'}})
+
+    def test_nested_lists(self):
+        field = {
+            'k1.k2': [[{'l1.l2': '123'}], [{'l3$': '456'}, 'a']],
+            'k3': [1, [2, 3]]
+        }
+
+        expected = {
+            u'k1\uff0ek2': [[{u'l1\uff0el2': '123'}], [{u'l3\uff04': '456'}, 'a']],
+            'k3': [1, [2, 3]]
+        }
+
+        escaped = mongoescape.escape_chars(field)
+        self.assertDictEqual(expected, escaped)
+
+        unescaped = mongoescape.unescape_chars(escaped)
+        self.assertDictEqual(field, unescaped)